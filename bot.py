@@ -1,15 +1,34 @@
 import os
 import asyncio
+import atexit
+import gzip
+import heapq
+import json
 import discord
 import aiohttp
-import aiofiles
+import orjson
 import google.generativeai as genai
 import logging
-from discord.ext import commands, tasks
+import queue
+import random
+import shutil
+import sys
+import time
+from cachetools import TTLCache
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from discord.ext import commands
 from dotenv import load_dotenv
 from datetime import datetime
 from discord.ui import View, Select
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable, Hashable
+
+uvloop = None
+if sys.platform != "win32":
+    try:
+        import uvloop
+    except ImportError:
+        pass
 
 # ==============================================================================
 # 1. SETUP LOGGING & CONFIGURATION
@@ -22,15 +41,28 @@ COMMITS_URL = os.getenv("COMMITS_URL")
 UPDATE_CHANNEL_ID = int(os.getenv("UPDATE_CHANNEL_ID", 0))
 LOG_FILE = os.getenv("LOG_FILE", "logs.txt")
 ERROR_LOG_FILE = os.getenv("ERROR_LOG_FILE", "errors.log")
-
+ETAG_FILE = os.getenv("ETAG_FILE", os.path.join(os.path.dirname(LOG_FILE), "etags.json"))
+NOT_MODIFIED = object()
+GEMINI_TIMEOUT = 20
+FETCH_RETRIES = 3
+MAX_RELATED_PRODUCTS = 8
+OUT_OF_STOCK = frozenset({"habis", "0", ""})
+POLL_INTERVAL_MIN = 300
+POLL_INTERVAL_MAX = 1800
+
+_log_records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_listener = QueueListener(
+    _log_records,
+    logging.FileHandler('bot.log', encoding='utf-8'),
+    logging.StreamHandler()
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(_log_records)]
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger('luxury_bot')
 logging.getLogger('grpc').setLevel(logging.ERROR)
 os.environ['GRPC_ENABLE_FORK_SUPPORT'] = '0'
@@ -38,39 +70,242 @@ os.environ['GRPC_ENABLE_FORK_SUPPORT'] = '0'
 # ==============================================================================
 # 2. UTILITY FUNCTIONS (LOGGING ASYNCHRONOUS)
 # ==============================================================================
-async def log_interaction(user: discord.User, query: str, answer: str) -> None:
+LOG_BATCH_SIZE = 1024
+LOG_FLUSH_BYTES = 64 * 1024
+LOG_FLUSH_INTERVAL = 5
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUP_COUNT = 5
+_last_ts: Tuple[int, str] = (0, "")
+_log_queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+_log_writer_running = False
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+def _build_file_logger(name: str, path: str) -> logging.Logger:
+    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                  encoding="utf-8", delay=True)
+    handler.terminator = ""
+    handler.namer = lambda default_name: f"{default_name}.gz"
+    handler.rotator = _gzip_rotator
+    file_logger = logging.getLogger(name)
+    file_logger.addHandler(handler)
+    file_logger.setLevel(logging.INFO)
+    file_logger.propagate = False
+    return file_logger
+
+_file_loggers: Dict[str, logging.Logger] = {
+    LOG_FILE: _build_file_logger('luxury_bot.interactions', LOG_FILE),
+    ERROR_LOG_FILE: _build_file_logger('luxury_bot.errors', ERROR_LOG_FILE),
+}
+
+def _append_sync(batches: Dict[str, List[str]]) -> None:
+    for path, entries in batches.items():
+        _file_loggers[path].info("".join(entries))
+
+def _drain_log_queue() -> Dict[str, List[str]]:
+    batches: Dict[str, List[str]] = {}
+    while not _log_queue.empty():
+        path, entry = _log_queue.get_nowait()
+        batches.setdefault(path, []).append(entry)
+    return batches
+
+async def _log_writer() -> None:
+    """Tugas latar belakang yang menampung log lalu menulisnya per batch ke file."""
+    global _log_writer_running
+    loop = asyncio.get_running_loop()
+    _log_writer_running = True
     try:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = (
-            f"[{timestamp}] User: {user.name} (ID: {user.id})\n"
-            f"Query: {query}\n"
-            f"Answer: {answer[:300]}...\n"
-            f"{'-' * 80}\n\n"
-        )
-        async with aiofiles.open(LOG_FILE, "a", encoding="utf-8") as f:
-            await f.write(log_entry)
+        while True:
+            path, entry = await _log_queue.get()
+            batches: Dict[str, List[str]] = {path: [entry]}
+            count, size = 1, len(entry)
+            deadline = loop.time() + LOG_FLUSH_INTERVAL
+            try:
+                while count < LOG_BATCH_SIZE and size < LOG_FLUSH_BYTES:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        path, entry = await asyncio.wait_for(_log_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    batches.setdefault(path, []).append(entry)
+                    count, size = count + 1, size + len(entry)
+            except asyncio.CancelledError:
+                _append_sync(batches)
+                raise
+            try:
+                await asyncio.to_thread(_append_sync, batches)
+            except Exception as e:
+                logger.error(f"Error menulis log ke file: {e}")
+    finally:
+        _log_writer_running = False
+
+async def _write_log(path: str, entry: str) -> None:
+    if _log_writer_running:
+        _log_queue.put_nowait((path, entry))
+        return
+    try:
+        await asyncio.to_thread(_append_sync, {path: [entry]})
     except Exception as e:
-        logger.error(f"Error logging interaction: {e}")
+        logger.error(f"Error menulis log ke file: {e}")
+
+def _ts_now() -> str:
+    global _last_ts
+    now = int(time.time())
+    if _last_ts[0] != now:
+        _last_ts = (now, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now)))
+    return _last_ts[1]
+
+async def log_interaction(user: discord.User, query: str, answer: str) -> None:
+    timestamp = _ts_now()
+    log_entry = (
+        f"[{timestamp}] User: {user.name} (ID: {user.id})\n"
+        f"Query: {query}\n"
+        f"Answer: {answer[:300]}...\n"
+        f"{'-' * 80}\n\n"
+    )
+    await _write_log(LOG_FILE, log_entry)
 
 async def log_error(error_msg: str) -> None:
-    try:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        async with aiofiles.open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
-            await f.write(f"[{timestamp}] {error_msg}\n\n")
-    except Exception as e:
-        logger.error(f"Error logging error: {e}")
+    timestamp = _ts_now()
+    await _write_log(ERROR_LOG_FILE, f"[{timestamp}] {error_msg}\n\n")
 
 # ==============================================================================
-# 3. BOT COG (KELAS UTAMA UNTUK SEMUA FUNGSI BOT)
+# 3. PARSER FILE DATA
+# ==============================================================================
+class DataFileParser:
+    """Parser bertahap untuk file data: diumpankan baris demi baris, lalu diambil hasilnya."""
+
+    def __init__(self):
+        self.products: List[Dict[str, Any]] = []
+        self.faq_items: List[Dict[str, str]] = []
+        self.categories: Dict[str, List[Dict[str, Any]]] = {}
+        self.name_token_index: Dict[str, List[int]] = {}
+        self.current_section: Optional[str] = None
+        self.line_no = 0
+
+    def feed(self, line: str) -> None:
+        self.line_no += 1
+        line = line.strip()
+        if not line or line[0] == "#": return
+        if line[0] == "[" and line[-1] == "]":
+            self.current_section = line[1:-1].upper()
+            return
+        section = self.current_section
+        if "|" not in line or section not in ("FAQ", "PRODUCTS"): return
+        try:
+            if section == "FAQ":
+                question, answer = [p.strip() for p in line.split("|", 1)]
+                self.faq_items.append({"question": question, "answer": answer})
+            else:
+                cat, name, price, desc, stock = [p.strip() for p in line.split("|", 4)]
+                name_tokens = frozenset(name.lower().split())
+                available = stock.lower() not in OUT_OF_STOCK
+                product = {"category": cat, "name": name, "price": price, "desc": desc, "stock": stock,
+                           "available": available, "stock_emoji": "✅" if available else "❌",
+                           "context_line": f"- **{name}** (Kategori: {cat}) | Harga: Rp {price} | Stok: {stock}\n"}
+                for token in name_tokens:
+                    self.name_token_index.setdefault(token, []).append(len(self.products))
+                self.products.append(product)
+                self.categories.setdefault(cat, []).append(product)
+        except ValueError:
+            logger.warning(f"Format data salah pada baris {self.line_no}: '{line}' -> dilewati.")
+
+    def result(self) -> Dict[str, Any]:
+        categories = self.categories
+        category_counts = {cat: (sum(p["available"] for p in prods), len(prods)) for cat, prods in categories.items()}
+        categories_lower = {cat.lower(): cat for cat in categories}
+        return {"products": self.products, "faq": self.faq_items, "categories": categories,
+                "name_index": self.name_token_index, "category_counts": category_counts,
+                "categories_lower": categories_lower}
+
+# ==============================================================================
+# 4. KOMPONEN UI (DROPDOWN)
+# ==============================================================================
+class FAQSelect(Select):
+    def __init__(self, faq_data: List[Dict[str, str]], options: List[discord.SelectOption]):
+        self.faq_data = faq_data
+        super().__init__(placeholder="Pilih pertanyaan...", options=list(options))
+
+    async def callback(self, interaction: discord.Interaction):
+        item = self.faq_data[int(self.values[0])]
+        embed_reply = discord.Embed(title=f"❓ {item['question']}", description=item['answer'],
+                                    color=discord.Color.green(), timestamp=datetime.now())
+        await interaction.response.send_message(embed=embed_reply, ephemeral=True)
+
+class HelpSelect(Select):
+    OPTIONS = [
+        discord.SelectOption(label="❓ FAQ", description="Cara kerja command !faq", emoji="❓"),
+        discord.SelectOption(label="📦 Stock", description="Cara kerja command !stock", emoji="📦"),
+        discord.SelectOption(label="💬 Tanya", description="Cara bertanya dengan AI", emoji="💬"),
+        discord.SelectOption(label="🤖 Tentang Bot", description="Info sistem dan auto update", emoji="🤖")
+    ]
+
+    def __init__(self, cog_instance: "LuxuryBotCog"):
+        self.cog = cog_instance
+        super().__init__(placeholder="Pilih kategori bantuan...", options=list(self.OPTIONS))
+
+    async def callback(self, interaction: discord.Interaction):
+        pilihan = self.values[0]
+        msg = self.cog.HELP_INFO.get(pilihan)
+        if pilihan == "🤖 Tentang Bot":
+            msg = msg.format(**self.cog.stats)
+        embed_reply = discord.Embed(title=f"📖 Bantuan: {pilihan}", description=msg, color=discord.Color.purple())
+        await interaction.response.send_message(embed=embed_reply, ephemeral=True)
+
+# ==============================================================================
+# 5. BOT COG (KELAS UTAMA UNTUK SEMUA FUNGSI BOT)
 # ==============================================================================
 class LuxuryBotCog(commands.Cog):
+    HELP_DESCRIPTION = (
+        "Selamat datang! Saya adalah bot asisten untuk Luxury VIP.\n\n**📋 Command Tersedia:**\n"
+        "• `!help` - Menampilkan menu bantuan ini\n• `!faq` - Pertanyaan yang sering ditanyakan\n"
+        "• `!stock [kategori]` - Melihat produk berdasarkan kategori\n• `!tanya <pertanyaan>` - Bertanya tentang produk (AI)\n"
+        "• `!ping` - Cek latensi bot\n• `!status` - Cek status sistem bot"
+    )
+    HELP_INFO = {
+        "❓ FAQ": "**Command: `!faq`**\nMenampilkan daftar pertanyaan umum. Pilih dari menu dropdown untuk melihat jawaban.",
+        "📦 Stock": "**Command: `!stock [kategori]`**\n- `!stock`: Menampilkan semua kategori.\n- `!stock <nama kategori>`: Menampilkan produk dalam kategori tersebut.",
+        "💬 Tanya": "**Command: `!tanya <pertanyaan>`**\nGunakan bahasa natural untuk bertanya. AI akan menjawab berdasarkan data produk.\n**Contoh:** `!tanya berapa harga VIP Gold?`",
+        "🤖 Tentang Bot": "**Luxury VIP Bot v3.1**\n- **AI:** Google Gemini 1.5 Flash\n- **Sumber Data:** GitHub\n- **Auto Update:** Adaptif, setiap 5-30 menit\n- **Total Produk:** {products}\n- **Total FAQ:** {faq}",
+    }
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.session: aiohttp.ClientSession = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, keepalive_timeout=75,
+                                           ttl_dns_cache=300, enable_cleanup_closed=True),
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers={"User-Agent": "luxury-bot/3.1", "Accept-Encoding": "gzip"}
+        )
         self.data_cache: Dict[str, List[Dict[str, Any]]] = {"products": [], "faq": []}
         self.product_categories: Dict[str, List[Dict[str, Any]]] = {}
+        self.name_token_index: Dict[str, List[int]] = {}
+        self.category_counts: Dict[str, Tuple[int, int]] = {}
+        self._category_lower_index: Dict[str, str] = {}
+        self.stats: Dict[str, int] = {"products": 0, "faq": 0, "categories": 0, "available": 0}
+        self._faq_options: List[discord.SelectOption] = []
+        self._faq_embed_template = discord.Embed(title="❓ FAQ - Pertanyaan yang Sering Ditanyakan",
+                                                 description="Pilih pertanyaan dari menu di bawah untuk melihat jawabannya:",
+                                                 color=discord.Color.blue())
         self.last_commit_hash: Optional[str] = None
+        self._remote_commit: Optional[str] = None
+        self._commits_etag: Optional[str] = None
+        self._data_validators: Dict[str, str] = {}
+        self._load_etags()
+        self._ai_cache: TTLCache = TTLCache(maxsize=512, ttl=900)
         self.model = self._initialize_gemini()
+        help_embed = discord.Embed(title="💎 Luxury VIP Assistant", description=self.HELP_DESCRIPTION,
+                                   color=discord.Color.gold())
+        help_embed.set_footer(text="Pilih menu di bawah untuk detail lebih lanjut.")
+        self._help_embed_dict = help_embed.to_dict()
+        self._log_writer_task: asyncio.Task = asyncio.create_task(_log_writer())
+        self._auto_update_task: Optional[asyncio.Task] = None
+        self._poll_interval: float = POLL_INTERVAL_MIN
         if GEMINI_API_KEY:
             genai.configure(api_key=GEMINI_API_KEY)
 
@@ -85,87 +320,187 @@ class LuxuryBotCog(commands.Cog):
             logger.error(f"Gagal inisialisasi model Gemini: {e}")
             return None
 
-    def cog_unload(self):
-        self.auto_update_data.cancel()
-        asyncio.create_task(self.session.close())
-
-    def _parse_data_file(self, content: str) -> Dict[str, Any]:
-        lines = content.strip().split("\n")
-        products, faq_items, categories = [], [], {}
-        current_section = None
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line or line.startswith("#"): continue
-            if line.startswith("[") and line.endswith("]"):
-                current_section = line[1:-1].upper()
-                continue
-            try:
-                if current_section == "FAQ" and "|" in line:
-                    question, answer = [p.strip() for p in line.split("|", 1)]
-                    faq_items.append({"question": question, "answer": answer})
-                elif current_section == "PRODUCTS" and "|" in line:
-                    cat, name, price, desc, stock = [p.strip() for p in line.split("|", 4)]
-                    product = {"category": cat, "name": name, "price": price, "desc": desc, "stock": stock}
-                    products.append(product)
-                    categories.setdefault(cat, []).append(product)
-            except ValueError:
-                logger.warning(f"Format data salah pada baris {i+1}: '{line}' -> dilewati.")
-        return {"products": products, "faq": faq_items, "categories": categories}
-
-    async def _fetch_url(self, url: str) -> Optional[Dict[str, Any] | str]:
+    def _load_etags(self) -> None:
         try:
-            async with self.session.get(url, timeout=10) as res:
-                if res.status == 200:
-                    if res.headers.get('Content-Type', '').startswith('application/json'):
-                        return await res.json()
-                    return await res.text()
-                else:
-                    logger.warning(f"Gagal ambil data dari {url}. Status: {res.status}")
-        except aiohttp.ClientError as e:
-            logger.error(f"Error fetching URL {url}: {e}")
-            return None
+            with open(ETAG_FILE, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            self._commits_etag = saved.get("commits_etag")
+            self._remote_commit = saved.get("commit")
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logger.error(f"Unexpected error fetching URL {url}: {e}")
-            return None
+            logger.warning(f"Gagal membaca file ETag {ETAG_FILE}: {e}")
+
+    async def _save_etags(self) -> None:
+        def _write():
+            with open(ETAG_FILE, "w", encoding="utf-8") as f:
+                json.dump({"commits_etag": self._commits_etag, "commit": self._remote_commit}, f)
+        try:
+            await asyncio.to_thread(_write)
+        except Exception as e:
+            logger.warning(f"Gagal menyimpan file ETag {ETAG_FILE}: {e}")
+
+    async def cog_unload(self):
+        if self._auto_update_task:
+            self._auto_update_task.cancel()
+        self._log_writer_task.cancel()
+        try:
+            await self._log_writer_task
+        except asyncio.CancelledError:
+            pass
+        try:
+            await asyncio.to_thread(_append_sync, _drain_log_queue())
+        except Exception as e:
+            logger.error(f"Error menulis sisa log saat unload: {e}")
+        await self.session.close()
+
+    async def _retrying_get(self, url: str, handler: Callable[[aiohttp.ClientResponse], Awaitable[Any]],
+                            headers: Optional[Dict[str, str]] = None, retries: int = FETCH_RETRIES) -> Any:
+        for attempt in range(retries):
+            try:
+                async with self.session.get(url, headers=headers) as res:
+                    if res.status == 304:
+                        return NOT_MODIFIED
+                    if res.status == 200:
+                        return await handler(res)
+                    logger.warning(f"Gagal ambil data dari {url}. Status: {res.status}")
+                    if res.status < 500 and res.status != 429:
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error fetching URL {url} (percobaan {attempt + 1}/{retries}): {e}")
+            except ValueError as e:
+                logger.error(f"Respons tidak valid dari {url}: {e}")
+                return None
+            except Exception as e:
+                logger.error(f"Unexpected error fetching URL {url}: {e}")
+                return None
+            if attempt < retries - 1:
+                await asyncio.sleep(min(2 ** attempt, 30) + random.uniform(0, 0.25))
+        return None
+
+    async def _fetch_json(self, url: str, etag: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+        headers = {"Accept": "application/vnd.github+json"}
+        if etag:
+            headers["If-None-Match"] = etag
+
+        async def _read(res: aiohttp.ClientResponse) -> Tuple[Any, Optional[str]]:
+            return orjson.loads(await res.read()), res.headers.get("ETag")
+
+        result = await self._retrying_get(url, _read, headers)
+        if result is NOT_MODIFIED:
+            return NOT_MODIFIED, etag
+        return result or (None, None)
+
+    async def _fetch_and_parse_data_stream(self, validators: Optional[Dict[str, str]] = None) -> Tuple[Any, Dict[str, str]]:
+        async def _parse(res: aiohttp.ClientResponse) -> Tuple[Dict[str, Any], Dict[str, str]]:
+            parser = DataFileParser()
+            async for raw_line in res.content:
+                parser.feed(raw_line.decode("utf-8"))
+            new_validators = {}
+            if "ETag" in res.headers:
+                new_validators["If-None-Match"] = res.headers["ETag"]
+            if "Last-Modified" in res.headers:
+                new_validators["If-Modified-Since"] = res.headers["Last-Modified"]
+            return parser.result(), new_validators
+
+        result = await self._retrying_get(DATA_URL, _parse, validators)
+        if result is NOT_MODIFIED:
+            return NOT_MODIFIED, validators or {}
+        return result or (None, {})
 
     async def fetch_data(self) -> bool:
-        content = await self._fetch_url(DATA_URL)
-        if isinstance(content, str):
-            parsed = self._parse_data_file(content)
+        has_cache = bool(self.data_cache["products"] or self.data_cache["faq"])
+        parsed, validators = await self._fetch_and_parse_data_stream(self._data_validators if has_cache else None)
+        if parsed is NOT_MODIFIED:
+            logger.info("👍 File data tidak berubah (304), memakai cache yang ada.")
+            return True
+        if parsed is not None:
             if parsed["products"] or parsed["faq"]:
                 self.data_cache["products"] = parsed["products"]
-                self.data_cache["faq"] = parsed["faq"
+                self.data_cache["faq"] = parsed["faq"]
                 self.product_categories = parsed["categories"]
-                logger.info(f"✅ Data berhasil dimuat/diperbarui: {len(parsed['products'])} produk, {len(parsed['faq'])} FAQ.")
+                self.name_token_index = parsed["name_index"]
+                self.category_counts = parsed["category_counts"]
+                self._category_lower_index = parsed["categories_lower"]
+                self.stats = {
+                    "products": len(parsed["products"]),
+                    "faq": len(parsed["faq"]),
+                    "categories": len(parsed["categories"]),
+                    "available": sum(available for available, _ in parsed["category_counts"].values()),
+                }
+                self._faq_options = [
+                    discord.SelectOption(label=f"Q{idx + 1}: {item['question'][:80]}", value=str(idx), emoji="❓")
+                    for idx, item in enumerate(parsed["faq"][:25])
+                ]
+                self._data_validators = validators
+                self._ai_cache.clear()
+                logger.info(f"✅ Data berhasil dimuat/diperbarui: {self.stats['products']} produk, {self.stats['faq']} FAQ.")
                 return True
             else:
                 logger.warning("⚠️ Data berhasil diunduh, namun tidak ada produk/FAQ valid yang ditemukan setelah parsing.")
         return False
 
     async def get_latest_commit(self) -> Optional[str]:
-        data = await self._fetch_url(COMMITS_URL)
+        data, etag = await self._fetch_json(COMMITS_URL, etag=self._commits_etag)
+        if data is NOT_MODIFIED:
+            return self._remote_commit
         if isinstance(data, dict):
-            return data.get("sha")
+            self._remote_commit = data.get("sha")
+            if etag != self._commits_etag:
+                self._commits_etag = etag
+                await self._save_etags()
+            return self._remote_commit
         return None
 
-    async def _ask_gemini(self, prompt: str) -> str:
+    async def _ask_gemini(self, prompt: str, cache_key: Hashable) -> str:
         if not self.model:
             return "Maaf, fitur AI saat ini tidak tersedia."
+        pending = self._ai_cache.get(cache_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._ai_cache[cache_key] = future
+        answer, ok = "Maaf, terjadi kesalahan saat memproses pertanyaan Anda. Silakan coba lagi nanti.", False
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, lambda: self.model.generate_content(prompt))
-            return response.text.strip()
+            response = await self.model.generate_content_async(prompt, request_options={"timeout": GEMINI_TIMEOUT})
+            answer, ok = response.text.strip(), True
         except Exception as e:
             logger.error(f"Error saat memanggil Gemini AI: {e}")
-            return "Maaf, terjadi kesalahan saat memproses pertanyaan Anda. Silakan coba lagi nanti."
+        finally:
+            if not ok:
+                self._ai_cache.pop(cache_key, None)
+            future.set_result(answer)
+        return answer
+
+    @property
+    def auto_update_running(self) -> bool:
+        return self._auto_update_task is not None and not self._auto_update_task.done()
+
+    async def _auto_update_loop(self):
+        """Tugas latar belakang dengan interval adaptif: melambat hanya saat data terkonfirmasi tidak berubah."""
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            try:
+                changed = await self.auto_update_data()
+            except Exception as e:
+                logger.error(f"Error pada auto update: {e}")
+                changed = True
+            if changed:
+                self._poll_interval = POLL_INTERVAL_MIN
+            else:
+                self._poll_interval = min(self._poll_interval * 1.5, POLL_INTERVAL_MAX)
 
-    @tasks.loop(minutes=5)
-    async def auto_update_data(self):
-        """Tugas latar belakang untuk memperbarui data secara otomatis."""
-        logger.info("⏳ Memeriksa pembaruan data dari GitHub...")
+    async def auto_update_data(self) -> bool:
+        """Memeriksa pembaruan data; mengembalikan False hanya jika data terkonfirmasi tidak berubah."""
+        logger.debug("⏳ Memeriksa pembaruan data dari GitHub...")
         new_commit = await self.get_latest_commit()
         force_fetch = not self.data_cache["products"] and not self.data_cache["faq"]
 
+        if new_commit is None and not force_fetch:
+            logger.warning("⚠️ Gagal memeriksa commit terbaru, akan dicoba lagi dengan interval minimum.")
+            return True
+
         if force_fetch:
             logger.info("Cache data kosong, mencoba mengambil data untuk pertama kali...")
 
@@ -181,15 +516,16 @@ class LuxuryBotCog(commands.Cog):
                         if channel:
                             embed = discord.Embed(
                                 title="🔄 Data Diperbarui",
-                                description=f"📦 Produk: **{len(self.data_cache['products'])}**\n❓ FAQ: **{len(self.data_cache['faq'])}**",
+                                description=f"📦 Produk: **{self.stats['products']}**\n❓ FAQ: **{self.stats['faq']}**",
                                 color=discord.Color.green(),
                                 timestamp=datetime.now()
                             )
                             await channel.send(embed=embed)
                     except Exception as e:
                         await log_error(f"Gagal mengirim notifikasi update: {e}")
-        else:
-            logger.info("👍 Data sudah versi terbaru. Tidak ada perubahan.")
+            return True
+        logger.debug("👍 Data sudah versi terbaru. Tidak ada perubahan.")
+        return False
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -202,8 +538,8 @@ class LuxuryBotCog(commands.Cog):
         ))
 
         await self.auto_update_data()
-        if not self.auto_update_data.is_running():
-            self.auto_update_data.start()
+        if not self.auto_update_running:
+            self._auto_update_task = asyncio.create_task(self._auto_update_loop())
 
         await self.bot.change_presence(activity=discord.Activity(
             type=discord.ActivityType.watching, name="!help | Luxury VIP"
@@ -233,16 +569,19 @@ class LuxuryBotCog(commands.Cog):
             return
 
         async with ctx.typing():
-            related_products = [p for p in self.data_cache["products"] if any(word in p["name"].lower() for word in query.lower().split())]
+            products = self.data_cache["products"]
+            query_tokens = query.lower().split()
+            norm_query = " ".join(query_tokens)
+            scores = Counter(i for tok in set(query_tokens) for i in self.name_token_index.get(tok, ()))
+            top = heapq.nlargest(MAX_RELATED_PRODUCTS, scores.items(), key=lambda hit: (hit[1], -hit[0]))
+            related_products = [products[i] for i, _ in top]
             if not related_products:
                 prompt = f"""Kamu adalah customer service Luxury VIP yang ramah dan profesional. Seseorang bertanya: "{query}" Namun pertanyaan ini tidak terkait dengan produk yang tersedia di katalog kami. Berikan respons yang sopan dan arahkan mereka untuk menggunakan !faq atau !stock. Jawab dalam bahasa Indonesia yang natural dan ramah."""
             else:
-                context = "Berikut detail produk yang relevan:\n\n"
-                for p in related_products:
-                    context += f"- **{p['name']}** (Kategori: {p['category']}) | Harga: Rp {p['price']} | Stok: {p['stock']}\n"
+                context = "Berikut detail produk yang relevan:\n\n" + "".join(p["context_line"] for p in related_products)
                 prompt = f"""Kamu adalah customer service Luxury VIP yang ramah, profesional, dan membantu. Gunakan data berikut untuk menjawab pertanyaan:\n{context}\nPertanyaan customer: "{query}"\nBerikan jawaban yang informatif, akurat, dan sopan dalam bahasa Indonesia. Jika ditanya cara beli, jelaskan prosesnya dengan friendly."""
 
-            answer = await self._ask_gemini(prompt)
+            answer = await self._ask_gemini(prompt, (norm_query, tuple(i for i, _ in top)))
 
             embed = discord.Embed(title="💬 Jawaban Luxury VIP",
                                   description=answer,
@@ -250,8 +589,7 @@ class LuxuryBotCog(commands.Cog):
                                   timestamp=datetime.now())
             if related_products and len(related_products) <= 3:
                 for p in related_products:
-                    stock_emoji = "✅" if p['stock'].lower() not in ["habis", "0"] else "❌"
-                    embed.add_field(name=f"{stock_emoji} {p['name']}",
+                    embed.add_field(name=f"{p['stock_emoji']} {p['name']}",
                                     value=f"🏷️ {p['category']}\n💰 Rp {p['price']}\n📊 Stok: {p['stock']}",
                                     inline=True)
             embed.set_footer(text=f"Ditanyakan oleh {ctx.author.name}")
@@ -264,28 +602,11 @@ class LuxuryBotCog(commands.Cog):
             await ctx.reply(embed=discord.Embed(title="⚠️ FAQ Belum Tersedia", description="Belum ada data FAQ.", color=discord.Color.orange()))
             return
 
-        embed = discord.Embed(title="❓ FAQ - Pertanyaan yang Sering Ditanyakan",
-                              description="Pilih pertanyaan dari menu di bawah untuk melihat jawabannya:",
-                              color=discord.Color.blue(),
-                              timestamp=datetime.now())
-
-        class FAQSelect(Select):
-            def __init__(self, faq_data: List[Dict[str, str]]):
-                self.faq_data = faq_data
-                options = [
-                    discord.SelectOption(label=f"Q{idx + 1}: {item['question'][:80]}", value=str(idx), emoji="❓")
-                    for idx, item in enumerate(faq_data[:25])
-                ]
-                super().__init__(placeholder="Pilih pertanyaan...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                item = self.faq_data[int(self.values[0])]
-                embed_reply = discord.Embed(title=f"❓ {item['question']}", description=item['answer'],
-                                              color=discord.Color.green(), timestamp=datetime.now())
-                await interaction.response.send_message(embed=embed_reply, ephemeral=True)
+        embed = self._faq_embed_template.copy()
+        embed.timestamp = datetime.now()
 
         view = View(timeout=180)
-        view.add_item(FAQSelect(self.data_cache["faq"))
+        view.add_item(FAQSelect(self.data_cache["faq"], self._faq_options))
         await ctx.reply(embed=embed, view=view)
 
     @commands.command(name="stock")
@@ -299,13 +620,12 @@ class LuxuryBotCog(commands.Cog):
                                   description="Gunakan `!stock <kategori>` untuk melihat produk.\nContoh: `!stock VIP Gold`",
                                   color=discord.Color.blue(),
                                   timestamp=datetime.now())
-            for cat, prods in self.product_categories.items():
-                available = sum(1 for p in prods if p['stock'].lower() not in ["habis", "0"])
-                embed.add_field(name=cat, value=f"✅ Tersedia: {available} / {len(prods)}", inline=True)
+            for cat, (available, total) in self.category_counts.items():
+                embed.add_field(name=cat, value=f"✅ Tersedia: {available} / {total}", inline=True)
             await ctx.reply(embed=embed)
             return
 
-        category_key = next((key for key in self.product_categories if key.lower() == category.lower()), None)
+        category_key = self._category_lower_index.get(category.lower())
         if not category_key:
             await ctx.reply(embed=discord.Embed(title="❌ Kategori Tidak Ditemukan", description=f"Kategori '{category}' tidak ada.", color=discord.Color.red()))
             return
@@ -313,47 +633,18 @@ class LuxuryBotCog(commands.Cog):
         products = self.product_categories[category_key]
         embed = discord.Embed(title=f"📦 Produk: {category_key}", color=discord.Color.blue(), timestamp=datetime.now())
         for item in products[:25]:
-            stock_emoji = "✅" if item['stock'].lower() not in ["habis", "0"] else "❌"
-            embed.add_field(name=f"{stock_emoji} {item['name']}",
+            embed.add_field(name=f"{item['stock_emoji']} {item['name']}",
                             value=f"💰 **Harga:** Rp {item['price']}\n📊 **Stok:** {item['stock']}",
                             inline=False)
         await ctx.reply(embed=embed)
 
     @commands.command(name="help")
     async def help_command(self, ctx: commands.Context):
-        embed = discord.Embed(title="💎 Luxury VIP Assistant",
-                              description="Selamat datang! Saya adalah bot asisten untuk Luxury VIP.\n\n**📋 Command Tersedia:**\n• `!help` - Menampilkan menu bantuan ini\n• `!faq` - Pertanyaan yang sering ditanyakan\n• `!stock [kategori]` - Melihat produk berdasarkan kategori\n• `!tanya <pertanyaan>` - Bertanya tentang produk (AI)\n• `!ping` - Cek latensi bot\n• `!status` - Cek status sistem bot",
-                              color=discord.Color.gold(),
-                              timestamp=datetime.now())
-        embed.set_footer(text="Pilih menu di bawah untuk detail lebih lanjut.")
+        embed = discord.Embed.from_dict(self._help_embed_dict)
+        embed.timestamp = datetime.now()
         if self.bot.user.avatar:
             embed.set_thumbnail(url=self.bot.user.avatar.url)
 
-        class HelpSelect(Select):
-            def __init__(self, cog_instance):
-                self.cog = cog_instance
-                options = [
-                    discord.SelectOption(label="❓ FAQ", description="Cara kerja command !faq", emoji="❓"),
-                    discord.SelectOption(label="📦 Stock", description="Cara kerja command !stock", emoji="📦"),
-                    discord.SelectOption(label="💬 Tanya", description="Cara bertanya dengan AI", emoji="💬"),
-                    discord.SelectOption(label="🤖 Tentang Bot", description="Info sistem dan auto update", emoji="🤖")
-                ]
-                super().__init__(placeholder="Pilih kategori bantuan...", options=options)
-
-            async def callback(self, interaction: discord.Interaction):
-                pilihan = self.values[0]
-                embed_info = {
-                    "❓ FAQ": "**Command: `!faq`**\nMenampilkan daftar pertanyaan umum. Pilih dari menu dropdown untuk melihat jawaban.",
-                    "📦 Stock": "**Command: `!stock [kategori]`**\n- `!stock`: Menampilkan semua kategori.\n- `!stock <nama kategori>`: Menampilkan produk dalam kategori tersebut.",
-                    "💬 Tanya": "**Command: `!tanya <pertanyaan>`**\nGunakan bahasa natural untuk bertanya. AI akan menjawab berdasarkan data produk.\n**Contoh:** `!tanya berapa harga VIP Gold?`",
-                    "🤖 Tentang Bot": (
-                        f"**Luxury VIP Bot v3.1**\n- **AI:** Google Gemini 1.5 Flash\n- **Sumber Data:** GitHub\n- **Auto Update:** Setiap 5 menit\n- **Total Produk:** {len(self.cog.data_cache['products'])}\n- **Total FAQ:** {len(self.cog.data_cache['faq'])}"
-                    ),
-                }
-                msg = embed_info.get(pilihan)
-                embed_reply = discord.Embed(title=f"📖 Bantuan: {pilihan}", description=msg, color=discord.Color.purple())
-                await interaction.response.send_message(embed=embed_reply, ephemeral=True)
-
         view = View(timeout=180)
         view.add_item(HelpSelect(self))
         await ctx.reply(embed=embed, view=view)
@@ -369,22 +660,30 @@ class LuxuryBotCog(commands.Cog):
     @commands.command(name="status")
     async def status(self, ctx: commands.Context):
         embed = discord.Embed(title="📊 Status Sistem Bot", color=discord.Color.blue(), timestamp=datetime.now())
-        tersedia = sum(1 for p in self.data_cache['products'] if p['stock'].lower() not in ["habis", "0"])
+        stats = self.stats
         embed.add_field(name="📡 Latency", value=f"{round(self.bot.latency * 1000)}ms", inline=True)
         embed.add_field(name="🏢 Servers", value=f"{len(self.bot.guilds)}", inline=True)
-        embed.add_field(name="🔄 Auto-Update", value="🟢 Aktif" if self.auto_update_data.is_running() else "🔴 Nonaktif",
+        embed.add_field(name="🔄 Auto-Update", value="🟢 Aktif" if self.auto_update_running else "🔴 Nonaktif",
                         inline=True)
-        embed.add_field(name="📦 Total Produk", value=f"{len(self.data_cache['products'])}", inline=True)
-        embed.add_field(name="🏷️ Kategori", value=f"{len(self.product_categories)}", inline=True)
-        embed.add_field(name="❓ FAQ", value=f"{len(self.data_cache['faq'])}", inline=True)
-        embed.add_field(name="✅ Stok Tersedia", value=f"{tersedia}", inline=True)
+        embed.add_field(name="📦 Total Produk", value=f"{stats['products']}", inline=True)
+        embed.add_field(name="🏷️ Kategori", value=f"{stats['categories']}", inline=True)
+        embed.add_field(name="❓ FAQ", value=f"{stats['faq']}", inline=True)
+        embed.add_field(name="✅ Stok Tersedia", value=f"{stats['available']}", inline=True)
         embed.add_field(name="💾 Commit",
                         value=f"`{self.last_commit_hash[:7]}`" if self.last_commit_hash else 'N/A', inline=True)
         await ctx.reply(embed=embed)
 
 # ==============================================================================
-# 4. MAIN EXECUTION
+# 6. MAIN EXECUTION
 # ==============================================================================
+class LuxuryBot(commands.Bot):
+    async def setup_hook(self):
+        logger.info("Framework bot siap, memuat Cog...")
+        try:
+            await self.add_cog(LuxuryBotCog(self))
+        except Exception as e:
+            logger.error(f"Gagal memuat LuxuryBotCog: {e}")
+
 async def main():
     if not all([DISCORD_TOKEN, GEMINI_API_KEY, DATA_URL, COMMITS_URL]):
         logger.critical("❌ Satu atau lebih environment variables (TOKEN, API_KEY, URL) tidak ditemukan.")
@@ -392,19 +691,12 @@ async def main():
 
     intents = discord.Intents.default()
     intents.message_content = True
-    bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
-
-    @bot.event
-    async def on_ready():
-        logger.info(f"Framework bot siap, memuat Cog...")
-        try:
-            await bot.add_cog(LuxuryBotCog(bot))
-        except Exception as e:
-            logger.error(f"Gagal memuat LuxuryBotCog: {e}")
+    bot = LuxuryBot(command_prefix="!", intents=intents, help_command=None)
 
     try:
         logger.info("🚀 Memulai Luxury VIP Bot...")
-        await bot.start(DISCORD_TOKEN)
+        async with bot:
+            await bot.start(DISCORD_TOKEN)
     except discord.LoginFailure:
         logger.critical("❌ Gagal login. Periksa kembali DISCORD_TOKEN.")
     except Exception as e:
@@ -413,6 +705,13 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None and sys.version_info >= (3, 11):
+            with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+                runner.run(main())
+        elif uvloop is not None:
+            uvloop.install()
+            asyncio.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("🛑 Bot dimatikan secara manual.")
\ No newline at end of file